@@ -38,6 +38,10 @@ class Configuration:
     seed: int = constants.SEED
     random_state: utils.SeedSequence = field(init=False)
     parallel: bool = False
+    warm_start: bool = False
+    early_stopping: bool = False
+    search_strategy: str = "grid"
+    n_trials: int = None
     movielens_version: str = "1m"
 
     lastfm_ground_truth_model: recsys.RecommenderType = "LMF"
@@ -62,6 +66,7 @@ class Configuration:
     movielens_recommender_dir: Path = None
     lastfm_ground_truth_file: Path = None
     movielens_ground_truth_file: Path = None
+    cache_dir: Path = None
 
     # only for convenience
     ground_truth_files: Dict[str, Path] = field(
@@ -83,6 +88,9 @@ class Configuration:
         self.random_state = utils.SeedSequence(start=self.seed)
         if not isinstance(self.ocef_dir, Path):
             self.ocef_dir = Path(self.ocef_dir)
+        if self.cache_dir is not None:
+            self.cache_dir = Path(self.cache_dir)
+            utils.makedir(self.cache_dir)
         if self.envy_experiment_name is None:
             self.envy_experiment_name = generate_slug()
 
@@ -40,6 +40,10 @@ parsers_config = {
         "const": "",
         "help": "Pretrained ground truth preferences file for MovieLens-`version`. If it exists, it is loaded by the given `movielens_ground_truth_model` class, otherwise ground truth preferences are saved here. If not given, defaults to a unique file with naming scheme `dataset``version`/unique slug/ground_truth.npz.",
     },
+    "cache_dir": {
+        "type": str,
+        "help": "Folder where the trained models and validation metrics of grid searches are memoized, so that interrupted or repeated searches skip the configurations already evaluated. Warm started models are not cached, see `warm_start`. If not given, nothing is cached.",
+    },
     "lastfm_ground_truth_model": {
         "nargs": "?",
         "default": "LMF",
@@ -78,6 +82,23 @@ parsers_config = {
         "action": "store_true",
         "help": "Whether to run grid searches in parallel.",
     },
+    "warm_start": {
+        "action": "store_true",
+        "help": "Whether to initialize models with the factors of similar, already trained ones and train them for fewer iterations: in sequential grid searches from the previous, closest configuration, and for recommenders from the best model with fewer factors. Warm started models depend on the previous ones and are not memoized in `cache_dir`: only the first configuration of sequential grid searches and the recommenders with the fewest factors are cached.",
+    },
+    "early_stopping": {
+        "action": "store_true",
+        "help": "Whether to stop training grid search configurations whose validation score, measured on a sample of users at a few training iterations, is not in the top third of the configurations evaluated so far.",
+    },
+    "search_strategy": {
+        "default": "grid",
+        "choices": ["grid", "sobol", "random"],
+        "help": "How the configurations of hyperparameter searches are chosen: all combinations of the hyperparameters' values, or `n_trials` of them drawn from a Sobol sequence or at random. For recommenders, every number of factors is searched.",
+    },
+    "n_trials": {
+        "type": int,
+        "help": "Number of configurations evaluated with `search_strategy` sobol or random. Defaults to the square root of the number of combinations.",
+    },
     "datasets": {
         "default": ["movielens", "lastfm"],
         "nargs": "+",
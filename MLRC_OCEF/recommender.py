@@ -1,11 +1,23 @@
+import contextlib
+import csv
+import functools
+import hashlib
 import itertools as it
 import logging
+import math
 import multiprocessing as mp
+import multiprocessing.managers
+import os
 import pprint
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Sequence, Tuple
+from typing import Callable, Dict, List, Sequence, Tuple, Union
 
+import joblib
+import numpy as np
+from joblib import Parallel, delayed
 from scipy import sparse
+from scipy.stats import qmc
 
 import config
 import constants
@@ -15,63 +27,500 @@ import utils
 
 logger = logging.getLogger(__name__)
 
+# NOTE bump whenever the training or validation of recommender_models changes,
+# it invalidates the results memoized in `conf.cache_dir`
+TRAIN_CACHE_VERSION = "1"
+
+# early stopping: training iterations at which configurations are compared,
+# only the best 1/ETA of the scores reported at a rung continue training
+EARLY_STOPPING_RUNGS = (2, 4, 8, 15)
+EARLY_STOPPING_ETA = 3
+EARLY_STOPPING_USERS = 1000
+
+
+class EarlyStop(Exception):
+    pass
+
+
+class RungPruner:
+    """
+    Asynchronous successive halving: configurations report their validation
+    score at fixed training iterations (rungs) and stop when they are not in
+    the top 1/eta of the scores reported so far at the same rung.
+    """
+
+    metric: str
+    scores: dict
+    lock: contextlib.AbstractContextManager
+    rungs: Tuple[int, ...]
+    eta: int
+
+    def __init__(
+        self,
+        metric: str,
+        scores: dict,
+        lock: contextlib.AbstractContextManager,
+        rungs: Tuple[int, ...] = EARLY_STOPPING_RUNGS,
+        eta: int = EARLY_STOPPING_ETA,
+    ):
+        # `scores` and `lock` are shared across processes in parallel grid
+        # searches (multiprocessing.Manager proxies)
+        self.metric = metric
+        self.scores = scores
+        self.lock = lock
+        self.rungs = rungs
+        self.eta = eta
+
+    def report(self, iteration: int, score: float):
+        if iteration not in self.rungs:
+            return
+        with self.lock:
+            scores = self.scores.get(iteration, []) + [score]
+            self.scores[iteration] = scores
+        if len(scores) >= self.eta and score < np.quantile(scores, 1 - 1 / self.eta):
+            raise EarlyStop(f"{self.metric}={score:.4f} at iteration {iteration}")
+
+    @staticmethod
+    def sample_users(valid: sparse.csr_matrix, random_state: int) -> sparse.csr_matrix:
+        # cheap validation at the rungs: keep the interactions of a few users
+        users = np.flatnonzero(np.diff(valid.indptr))
+        rng = np.random.default_rng(random_state)
+        if users.size > EARLY_STOPPING_USERS:
+            users = rng.choice(users, EARLY_STOPPING_USERS, replace=False)
+        mask = np.zeros(valid.shape[0], dtype=valid.dtype)
+        mask[users] = 1
+        return sparse.csr_matrix(sparse.diags(mask) @ valid)
+
 
 def save_hyperparams_and_metrics(filename: Path, hparams: dict, info: dict):
-    header = f"{','.join(list(hparams) + list(info))}"
-    content = list(hparams.values()) + list(info.values())
-    content = ",".join(list(map(str, content)))
-    with open(filename, "w") as fd:
-        fd.write(header + "\n")
-        fd.write(content + "\n")
+    with open(filename, "w", newline="", buffering=1 << 16) as fd:
+        writer = csv.writer(fd)
+        writer.writerow([*hparams, *info])
+        writer.writerow([*hparams.values(), *info.values()])
     logger.debug("Saved best model hyperparams and info to %s", filename)
 
 
+def csr_fingerprint(mat: sparse.csr_matrix) -> str:
+    """
+    Hashes the content of a sparse matrix, cheaper than letting joblib.Memory
+    pickle the whole matrix to hash it.
+
+    Args:
+        mat: A CSR matrix.
+
+    Returns:
+        Hex digest of the shape and of the CSR arrays of `mat`.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(mat.shape).encode())
+    for arr in (mat.data, mat.indices, mat.indptr):
+        h.update(np.ascontiguousarray(arr))
+    return h.hexdigest()
+
+
+def grid_search_inputs(
+    train: sparse.csr_matrix,
+    valid: sparse.csr_matrix,
+    model_class: recsys.RecommenderType,
+) -> Tuple[sparse.csr_matrix, sparse.csr_matrix]:
+    # converted once per grid search rather than by every configuration:
+    # Recommender.validate expects csr_matrix, implicit fits on float32 data
+    train, valid = sparse.csr_matrix(train), sparse.csr_matrix(valid)
+    if model_class.train_dtype is not None:
+        train = train.astype(model_class.train_dtype, copy=False)
+    return train, valid
+
+
+def grid_search_data_key(
+    train: sparse.csr_matrix, valid: sparse.csr_matrix, conf: config.Configuration
+) -> str:
+    # identifies the train/validation split in the cache keys, if memoizing
+    if conf.cache_dir is None:
+        return None
+    return f"{csr_fingerprint(train)}-{csr_fingerprint(valid)}"
+
+
+def canonical_hparams(hp: dict) -> Tuple[Tuple[str, float], ...]:
+    # identical configurations give the same cache key regardless of the order
+    # of the hparams and of the type of their values (e.g. 16 and 16.0); 12
+    # significant digits absorb float noise without merging small values
+    return tuple(sorted((k, float(f"{float(v):.12g}")) for k, v in hp.items()))
+
+
+def early_stopping_sample(
+    valid: sparse.csr_matrix, seedgen: utils.SeedSequence, conf: config.Configuration
+) -> sparse.csr_matrix:
+    # all configurations of a search are scored on the same users at the rungs,
+    # so that their scores are comparable
+    if not conf.early_stopping:
+        return None
+    return RungPruner.sample_users(valid, next(seedgen))
+
+
+def rung_callback(
+    model: recsys.RecommenderType,
+    pruner: RungPruner,
+    train: sparse.csr_matrix,
+    valid_sample: sparse.csr_matrix,
+    k: int,
+) -> Callable:
+    # called by implicit after each training iteration, validates `model` on
+    # `valid_sample` at the pruner's rungs
+    def callback(iteration: int, *_):
+        if iteration + 1 in pruner.rungs:
+            score = model.validate(train, valid_sample, k=k)[pruner.metric]
+            pruner.report(iteration + 1, score)
+
+    return callback
+
+
+def fit_and_validate(
+    cache_key: tuple,
+    model_class: recsys.RecommenderType,
+    hp: dict,
+    random_state: int,
+    train: sparse.csr_matrix,
+    valid: sparse.csr_matrix,
+    k: int,
+    init_model: recsys.RecommenderType = None,
+    pruner: RungPruner = None,
+    valid_sample: sparse.csr_matrix = None,
+) -> Tuple[Dict[str, float], recsys.RecommenderType]:
+    # `cache_key` identifies the call when memoized, see
+    # `train_eval_one_configuration`
+    model = model_class(**hp, random_state=random_state)
+    if init_model is not None:
+        model.warm_start(init_model)
+    callback = None
+    if pruner is not None:
+        callback = rung_callback(model, pruner, train, valid_sample, k)
+    model.train(train, callback=callback)
+    return model.validate(train, valid, k=k), model
+
+
 def train_eval_one_configuration(
-    hp: dict, rest
+    hp: dict, rest, init_model: recsys.RecommenderType = None
 ) -> Tuple[Dict[str, float], Dict[str, float], recsys.RecommenderType, int]:
-    model_class, hparams_names, train, valid, k, seedgen = rest
+    (
+        model_class,
+        hparams_names,
+        train,
+        valid,
+        k,
+        seedgen,
+        cache_dir,
+        data_key,
+        pruner,
+        valid_sample,
+    ) = rest
     hp = dict(zip(hparams_names, hp))
-    model = model_class(**hp, random_state=next(seedgen))
+    random_state = next(seedgen)
+    fit_fn = fit_and_validate
+    # warm started results depend on the previous model, they are not memoized
+    if cache_dir is not None and init_model is None:
+        # memoize on the cache key only, the other arguments are either
+        # summarized by it or too expensive for joblib to hash
+        fit_fn = joblib.Memory(cache_dir, verbose=0).cache(
+            fit_and_validate,
+            ignore=[
+                "model_class",
+                "hp",
+                "random_state",
+                "train",
+                "valid",
+                "k",
+                "init_model",
+                "pruner",
+                "valid_sample",
+            ],
+        )
+    cache_key = (
+        TRAIN_CACHE_VERSION,
+        model_class.__name__,
+        canonical_hparams(hp),
+        random_state,
+        data_key,
+        k,
+    )
+    try:
+        valid_metrics, model = fit_fn(
+            cache_key,
+            model_class,
+            hp,
+            random_state,
+            train,
+            valid,
+            k,
+            init_model,
+            pruner,
+            valid_sample,
+        )
+    except EarlyStop as e:
+        logger.info("Hparams: %s, stopped early (%s)", hp, e)
+        # worst possible scores, ignored when picking the best configuration
+        valid_metrics = dict.fromkeys(("precision", "map", "ndcg", "auc"), -np.inf)
+        return valid_metrics, hp, None, seedgen.val
     logger_ = getattr(model, "logger", logger)
-    model.train(train)
-    valid_metrics = model.validate(train, valid, k=k)
     logger_.info("Hparams: %s", hp)
     logger_.info("Validation metrics @%d: %s", k, valid_metrics)
     return valid_metrics, hp, model, seedgen.val
 
 
-def search_best_model(
+def hyperparams_grid(hyperparams: Dict[str, Sequence[float]]) -> np.ndarray:
+    """
+    Makes the grid of configurations of a grid search.
+
+    Args:
+        hyperparams: The values taken by each hyperparameter.
+
+    Returns:
+        A structured array with one field per hyperparameter (in the order of
+        `hyperparams`) and one row per element of the cartesian product of
+        their values.
+    """
+    dtype = [(name, np.asarray(values).dtype) for name, values in hyperparams.items()]
+    # filled straight from the lazy cartesian product, without a list of tuples
+    return np.fromiter(
+        it.product(*hyperparams.values()),
+        dtype=dtype,
+        count=math.prod(map(len, hyperparams.values())),
+    )
+
+
+def sample_grid(
+    grid: np.ndarray,
+    seedgen: utils.SeedSequence,
+    conf: config.Configuration,
+    exhaustive: Sequence[str] = (),
+) -> np.ndarray:
+    """
+    Selects the configurations evaluated by a search according to
+    `conf.search_strategy`: all of them ("grid"), or `conf.n_trials` of them
+    (default: square root of the grid size) drawn from a scrambled Sobol
+    sequence ("sobol") or uniformly at random ("random").
+
+    Args:
+        grid: The full grid of configurations, see `hyperparams_grid`.
+        seedgen: Seeds the sampling.
+        conf: The experiment configuration.
+        exhaustive: Hyperparameters whose values are all kept; the others are
+                    sampled once and crossed with them.
+
+    Returns:
+        The rows of `grid` to evaluate.
+    """
+    sampled = [name for name in grid.dtype.names if name not in exhaustive]
+    if conf.search_strategy == "grid" or not sampled:
+        return grid
+    # position of the value of each configuration among its hparam's values
+    levels, codes = zip(
+        *(np.unique(grid[name], return_inverse=True) for name in sampled)
+    )
+    sizes = [len(level) for level in levels]
+    subgrid_size = math.prod(sizes)
+    n_trials = min(conf.n_trials or math.ceil(math.sqrt(subgrid_size)), subgrid_size)
+    seed = next(seedgen)
+    if conf.search_strategy == "sobol":
+        # quantize the points in [0, 1)^d to the hparams' values; draws a
+        # power of 2 of points to keep the sequence balanced
+        m = math.ceil(math.log2(n_trials))
+        points = qmc.Sobol(d=len(sizes), seed=seed).random_base2(m)[:n_trials]
+        indices = np.floor(points * sizes).astype(int)
+        chosen = np.ravel_multi_index(tuple(indices.T), sizes)
+    else:
+        rng = np.random.default_rng(seed)
+        chosen = rng.choice(subgrid_size, n_trials, replace=False)
+    selected = np.isin(np.ravel_multi_index(codes, sizes), chosen)
+    logger.info(
+        "%s search: %d of %d configurations",
+        conf.search_strategy,
+        selected.sum(),
+        grid.size,
+    )
+    return grid[selected]
+
+
+def log_hparams(grid: np.ndarray) -> np.ndarray:
+    # hyperparameters grids are mostly logarithmic, compare them in log space
+    points = np.column_stack([grid[name] for name in grid.dtype.names])
+    points = points.astype(float)
+    return np.log10(points, out=points, where=points > 0)
+
+
+def grid_search_executor(
+    n_configurations: int, conf: config.Configuration
+) -> Union[Parallel, contextlib.nullcontext]:
+    """
+    Makes the worker pool shared by consecutive grid searches, to be used as a
+    context manager so that workers are spawned only once.
+
+    Args:
+        n_configurations: The number of configurations evaluated by each grid
+                          search, caps the number of workers.
+        conf: The experiment configuration.
+
+    Returns:
+        A joblib.Parallel instance when `conf.parallel` is set, otherwise a
+        null context yielding None (sequential grid search).
+    """
+    if not conf.parallel:
+        return contextlib.nullcontext()
+    n_procs = min(n_configurations, mp.cpu_count())
+    logger.info("Spawning %d processes for grid search", n_procs)
+    # the loky backend memmaps the arrays backing train_mat and valid_mat
+    # once instead of pickling them for every configuration; batch_size=1
+    # hands out configurations one at a time, so slow ones do not leave
+    # idle workers
+    return Parallel(n_jobs=n_procs, backend="loky", max_nbytes="1M", batch_size=1)
+
+
+@contextlib.contextmanager
+def early_stopping_manager(conf: config.Configuration, parallel: Parallel = None):
+    """
+    Makes the manager process sharing the early stopping scores across the
+    workers of parallel grid searches, to be used as a context manager
+    together with the worker pool so that it is started only once.
+
+    Args:
+        conf: The experiment configuration.
+        parallel: The worker pool of the grid searches, if any.
+
+    Yields:
+        A multiprocessing.Manager if `conf.early_stopping` is set and grid
+        searches run in more than one worker, None otherwise.
+    """
+    # joblib runs a single job in this process, plain dicts are shared as is
+    if conf.early_stopping and parallel is not None and parallel.n_jobs != 1:
+        with mp.Manager() as manager:
+            yield manager
+    else:
+        yield None
+
+
+def early_stopping_pruner(
+    conf: config.Configuration, manager: mp.managers.SyncManager = None
+) -> RungPruner:
+    """
+    Makes the pruner used to stop unpromising configurations early during a
+    grid search.
+
+    Args:
+        conf: The experiment configuration.
+        manager: The manager from `early_stopping_manager`, if any.
+
+    Returns:
+        A new RungPruner if `conf.early_stopping` is set, None otherwise. Its
+        scores are shared across workers through `manager` when given.
+    """
+    if not conf.early_stopping:
+        return None
+    if manager is None:
+        return RungPruner(
+            conf.recommender_evaluation_metric, {}, contextlib.nullcontext()
+        )
+    return RungPruner(
+        conf.recommender_evaluation_metric, manager.dict(), manager.Lock()
+    )
+
+
+@contextlib.contextmanager
+def grid_search_matrices(
     train_mat: sparse.csr_matrix,
     valid_mat: sparse.csr_matrix,
-    hparams_names: Sequence[str],
-    hparams_flat: Sequence[float],
+    parallel: Parallel = None,
+):
+    """
+    Makes the train and validation matrices handed to the configurations of
+    grid searches.
+
+    Args:
+        train_mat: The training matrix.
+        valid_mat: The validation matrix.
+        parallel: The worker pool of the grid searches, if any.
+
+    Yields:
+        The matrices as they are for grid searches run in this process,
+        otherwise copies in shared memory (utils.SharedCSRMatrix) which
+        workers attach to instead of receiving a pickled copy with every
+        configuration.
+    """
+    # joblib runs a single job in this process, without pickling the handles
+    if parallel is None or parallel.n_jobs == 1:
+        yield train_mat, valid_mat
+        return
+    with utils.SharedCSRMatrix(train_mat) as train_shm, utils.SharedCSRMatrix(
+        valid_mat, group=train_shm.group
+    ) as valid_shm:
+        yield train_shm, valid_shm
+
+
+def search_best_model(
+    train_mat: Union[sparse.csr_matrix, utils.SharedCSRMatrix],
+    valid_mat: Union[sparse.csr_matrix, utils.SharedCSRMatrix],
+    hparams_grid: np.ndarray,
     seedgen: utils.SeedSequence,
     model_class: recsys.RecommenderType,
     conf: config.Configuration,
+    parallel: Parallel = None,
+    data_key: str = None,
+    init_model: recsys.RecommenderType = None,
+    manager: mp.managers.SyncManager = None,
+    valid_sample: sparse.csr_matrix = None,
 ) -> dict:
-    repeat_args = [
-        [
-            model_class,
-            list(hparams_names),
-            train_mat,
-            valid_mat,
-            conf.evaluation_k,
-            seedgen,
-        ]
-    ] * len(hparams_flat)
-    args = list(zip(hparams_flat, repeat_args))
-
-    if conf.parallel:
-        n_procs = min(len(hparams_flat), mp.cpu_count())
-        logger.info("Spawning %d processes for grid search", n_procs)
-        with mp.Pool(processes=n_procs) as pool:
-            res = pool.starmap(train_eval_one_configuration, args)
-    else:
-        res = [train_eval_one_configuration(*arg) for arg in args]
+    if data_key is None:
+        data_key = grid_search_data_key(train_mat, valid_mat, conf)
+    if valid_sample is None:
+        valid_sample = early_stopping_sample(valid_mat, seedgen, conf)
+    # a standalone search starts its own manager, if one is needed
+    manager_context = (
+        early_stopping_manager(conf, parallel)
+        if manager is None
+        else contextlib.nullcontext(manager)
+    )
+    with manager_context as manager:
+        pruner = early_stopping_pruner(conf, manager)
+        # the arguments shared by all configurations are bound once
+        worker = functools.partial(
+            train_eval_one_configuration,
+            rest=(
+                model_class,
+                list(hparams_grid.dtype.names),
+                train_mat,
+                valid_mat,
+                conf.evaluation_k,
+                seedgen,
+                conf.cache_dir,
+                data_key,
+                pruner,
+                valid_sample,
+            ),
+        )
+
+        if parallel is not None:
+            res = parallel(
+                delayed(worker)(hp.item(), init_model=init_model) for hp in hparams_grid
+            )
+        elif conf.warm_start:
+            # visit neighbouring configurations one after the other, so that
+            # each model starts from the factors of a model trained on similar
+            # hparams; model state is not shared across processes, hence
+            # sequential only
+            tour = utils.nearest_neighbour_order(log_hparams(hparams_grid))
+            res = []
+            for i in tour:
+                res.append(worker(hparams_grid[i].item(), init_model=init_model))
+                # configurations stopped early have no model
+                if res[-1][2] is not None:
+                    init_model = res[-1][2]
+        else:
+            res = [worker(hp.item(), init_model=init_model) for hp in hparams_grid]
 
     best_metrics, best_hparams, best_model, seed_val = max(
         res, key=lambda el: el[0][conf.recommender_evaluation_metric]
     )
+    # models memoized or trained by workers come back without preferences
+    if best_model.preferences is None:
+        best_model.set_preferences()
     return {
         "model": best_model,
         "hparams": best_hparams,
@@ -100,15 +549,30 @@ def search_ground_truth(
     logger.info("Hyperparameters in grid search for dataset %s:", dataset)
     logger.info(pprint.pformat(hyperparams))
 
-    best_dict = search_best_model(
-        train_mat,
-        valid_mat,
-        hyperparams.keys(),
-        list(it.product(*hyperparams.values())),
-        seedgen,
-        ground_truth_model_class,
-        conf,
+    grid = sample_grid(hyperparams_grid(hyperparams), seedgen, conf)
+    train_mat, valid_mat = grid_search_inputs(
+        train_mat, valid_mat, ground_truth_model_class
     )
+    data_key = grid_search_data_key(train_mat, valid_mat, conf)
+    valid_sample = early_stopping_sample(valid_mat, seedgen, conf)
+    with contextlib.ExitStack() as stack:
+        parallel = stack.enter_context(grid_search_executor(grid.size, conf))
+        manager = stack.enter_context(early_stopping_manager(conf, parallel))
+        train, valid = stack.enter_context(
+            grid_search_matrices(train_mat, valid_mat, parallel)
+        )
+        best_dict = search_best_model(
+            train,
+            valid,
+            grid,
+            seedgen,
+            ground_truth_model_class,
+            conf,
+            parallel=parallel,
+            data_key=data_key,
+            manager=manager,
+            valid_sample=valid_sample,
+        )
 
     model_save_path = conf.ground_truth_files[dataset]
     best_dict["model"].save(model_save_path)
@@ -134,34 +598,67 @@ def search_recommender(
     logger.info("%s, Hyperparameters in recommender grid search:", model_class)
     logger.info(pprint.pformat(hyperparams))
 
-    hyperparams_inner = hyperparams.copy()
-    factors = hyperparams_inner.pop("factors")
-    hyperparams_inner_flat = list(it.product(*hyperparams_inner.values()))
+    factors = hyperparams["factors"]
+    # a best model is saved for every factor, only the other hparams are sampled
+    grid = sample_grid(
+        hyperparams_grid(hyperparams), seedgen, conf, exhaustive=("factors",)
+    )
+    # the same for all factors, converted and fingerprinted once
+    train_mat, valid_mat = grid_search_inputs(train_mat, valid_mat, model_class)
+    data_key = grid_search_data_key(train_mat, valid_mat, conf)
+    valid_sample = early_stopping_sample(valid_mat, seedgen, conf)
 
-    # save the best model for each factor
-    for factor in factors:
-        # NOTE (factor, ) + hparams relies on the keys of hyperparams to be,
-        # in order, factors,regularization,alpha; there is an easy fix for
-        # this not implemented rn
-        hparams = list((factor,) + hp for hp in hyperparams_inner_flat)
-        best_dict = search_best_model(
-            train_mat,
-            valid_mat,
-            hyperparams.keys(),
-            hparams,
-            seedgen,
-            model_class,
-            conf,
+    # save the best model for each factor, reusing the same workers; in
+    # increasing order, to warm start from the best model with fewer factors
+    init_model = None
+    model_save_path = conf.recommender_dirs[dataset] / config.RECOMMENDER_NAME
+    saves = []
+    with contextlib.ExitStack() as stack:
+        # models are written in background threads while the next factor's
+        # grid search runs; leaving the stack waits for all writes
+        io_pool = stack.enter_context(ThreadPoolExecutor(max_workers=2))
+        parallel = stack.enter_context(
+            grid_search_executor(grid.size // len(factors), conf)
         )
-
-        model_save_path = conf.recommender_dirs[dataset] / config.RECOMMENDER_NAME
-        best_dict["model"].save(f"{model_save_path}_factors_{factor}.npz")
-        logger.debug("Saved best model to %s.npz", model_save_path)
-
-        hparams_save_path = f"{model_save_path}_factors_{factor}_hparams.txt"
-        save_hyperparams_and_metrics(
-            hparams_save_path, best_dict["hparams"], best_dict["info"]
+        # a pruner with fresh scores is made for each factor
+        manager = stack.enter_context(early_stopping_manager(conf, parallel))
+        train, valid = stack.enter_context(
+            grid_search_matrices(train_mat, valid_mat, parallel)
         )
+        for factor in sorted(factors):
+            best_dict = search_best_model(
+                train,
+                valid,
+                grid[grid["factors"] == factor],
+                seedgen,
+                model_class,
+                conf,
+                parallel=parallel,
+                data_key=data_key,
+                init_model=init_model,
+                manager=manager,
+                valid_sample=valid_sample,
+            )
+            if conf.warm_start:
+                init_model = best_dict["model"]
+
+            saves.append(
+                io_pool.submit(
+                    best_dict["model"].save, f"{model_save_path}_factors_{factor}.npz"
+                )
+            )
+            hparams_save_path = f"{model_save_path}_factors_{factor}_hparams.txt"
+            saves.append(
+                io_pool.submit(
+                    save_hyperparams_and_metrics,
+                    hparams_save_path,
+                    best_dict["hparams"],
+                    best_dict["info"],
+                )
+            )
+    # re-raise errors of the writes, if any
+    for save in saves:
+        save.result()
 
 
 def generate_ground_truth(
@@ -194,8 +691,7 @@ def generate_recommenders(
     else:
         logger.error("No recommender system implemented for dataset %s", dataset)
         raise NotImplementedError
-    recommender_files = list_default_recommender_files(conf.recommender_dirs[dataset])
-    if recommender_files:
+    if has_default_recommender_files(conf.recommender_dirs[dataset]):
         logger.info(
             "Load pretrained recommenders from %s (no grid search for %s)",
             conf.recommender_dirs[dataset],
@@ -210,9 +706,16 @@ def generate_recommenders(
         search_recommender(dataset, train, valid, seedgen, conf)
 
 
+def is_default_recommender_file(filename: str) -> bool:
+    return filename.endswith(".npz") and config.GROUND_TRUTH_NAME not in filename
+
+
+def has_default_recommender_files(folder: Path) -> bool:
+    # os.scandir avoids building a Path per entry and stops at the first match
+    with os.scandir(folder) as entries:
+        return any(is_default_recommender_file(e.name) for e in entries)
+
+
 def list_default_recommender_files(folder: Path) -> List[Path]:
-    return [
-        f
-        for f in folder.iterdir()
-        if f.suffix == ".npz" and config.GROUND_TRUTH_NAME not in f.name
-    ]
+    with os.scandir(folder) as entries:
+        return [Path(e.path) for e in entries if is_default_recommender_file(e.name)]
@@ -1,6 +1,6 @@
 import logging
 from pathlib import Path
-from typing import Dict, Union
+from typing import Callable, Dict, Union
 
 import implicit
 import numpy as np
@@ -20,6 +20,11 @@ import utils
 
 RecommenderType = Union["SVDS", "ALS", "LMF"]
 
+# training iterations of a model initialized from the factors of a similar one
+WARM_START_ITERATIONS = 5
+# users scored at once during validation
+VALIDATION_BATCH_SIZE = 4096
+
 
 def check_extension(p: Path, ext: str = ".npz") -> Path:
     if not isinstance(p, Path):
@@ -29,22 +34,99 @@ def check_extension(p: Path, ext: str = ".npz") -> Path:
     return p
 
 
+def ranking_metrics_at_k(
+    user_factors: np.ndarray,
+    item_factors: np.ndarray,
+    train_mat: sparse.csr_matrix,
+    test_mat: sparse.csr_matrix,
+    k: int = 40,
+    batch_size: int = VALIDATION_BATCH_SIZE,
+) -> Dict[str, float]:
+    """
+    Computes the same ranking metrics as implicit.evaluation.ranking_metrics_at_k
+    from the latent factors of a model, scoring and ranking users in batches
+    with matrix operations instead of one user at a time.
+
+    Args:
+        user_factors: 2D array of user factors.
+        item_factors: 2D array of item factors.
+        train_mat: User-item training interactions, excluded from the
+                   recommendations.
+        test_mat: User-item interactions to retrieve.
+        k: Number of recommendations per user.
+        batch_size: Number of users scored at once.
+
+    Returns:
+        A dictionary with precision, map, ndcg and auc @k, averaged over the
+        users with at least one interaction in `test_mat`.
+    """
+    n_items = item_factors.shape[0]
+    k = min(k, n_items)
+    discount = 1.0 / np.log2(np.arange(2, k + 2))
+    ideal_dcg = np.cumsum(discount)
+    ranks = np.arange(1, k + 1)
+    n_likes = np.diff(test_mat.indptr)
+    users = np.flatnonzero(n_likes)
+
+    relevant = total = ap = ndcg = auc = 0.0
+    for start in range(0, users.size, batch_size):
+        batch = users[start : start + batch_size]
+        scores = user_factors[batch] @ item_factors.T
+        # filter out the items seen during training
+        liked = train_mat[batch]
+        liked_rows = np.repeat(np.arange(batch.size), np.diff(liked.indptr))
+        scores[liked_rows, liked.indices] = -np.inf
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        hits = test_mat[batch][np.arange(batch.size)[:, None], top].toarray() != 0
+
+        n_pos = n_likes[batch]
+        n_neg = n_items - n_pos
+        n_rel = np.minimum(k, n_pos)
+        hits_so_far = np.cumsum(hits, axis=1)
+        n_hits = hits_so_far[:, -1]
+        relevant += n_hits.sum()
+        total += n_rel.sum()
+        ap += (np.sum(hits * hits_so_far / ranks, axis=1) / n_rel).sum()
+        ndcg += (hits @ discount / ideal_dcg[n_rel - 1]).sum()
+        user_auc = np.sum(~hits * hits_so_far, axis=1)
+        user_auc = user_auc + (n_hits + n_pos) / 2.0 * (n_neg - (k - n_hits))
+        auc += (user_auc / (n_pos * n_neg)).sum()
+
+    return {
+        "precision": float(relevant / total),
+        "map": float(ap / users.size),
+        "ndcg": float(ndcg / users.size),
+        "auc": float(auc / users.size),
+    }
+
+
 # NOTE majority of functionality for Implicit models is here to avoid repetition
 class Recommender:
     model: Union[AlternatingLeastSquares, LogisticMatrixFactorization, "SVDS"] = None
     factors: int = None
     logger: logging.Logger = None
     preferences: np.ndarray = None
+    # dtype the training data is converted to by the underlying model
+    train_dtype: np.dtype = None
     _model_class: type = None
 
     def __init__(self, factors: int):
         self.factors = factors
         self.logger = logging.getLogger(f"{__name__}:{type(self).__name__}")
 
-    def train(self, train_mat: Union[np.ndarray, sparse.csr_array], show_progress=True):
+    def train(
+        self,
+        train_mat: Union[np.ndarray, sparse.csr_array],
+        show_progress=True,
+        callback: Callable = None,
+    ):
         if isinstance(train_mat, np.ndarray):
             train_mat = sparse.csr_array(train_mat)
-        self.model.fit(train_mat, show_progress=show_progress)
+        # `callback` is called by implicit after each training iteration
+        kwargs = {} if callback is None else {"callback": callback}
+        self.model.fit(train_mat, show_progress=show_progress, **kwargs)
         self.set_preferences()
 
     def set_preferences(self):
@@ -66,6 +148,43 @@ class Recommender:
             pass
         self.preferences = user_factors @ item_factors.T
 
+    def warm_start(self, other: "Recommender"):
+        """
+        Initializes the latent factors with those of another trained model
+        of the same kind, and shortens training accordingly. When `other` has
+        fewer factors, its factors fill the first columns and the remaining
+        ones get a small random initialization. Does nothing if the two
+        models are not compatible.
+
+        Args:
+            other: A trained recommender, e.g. from a nearby grid search
+                   configuration or with fewer factors.
+        """
+        if type(other) is not type(self) or other.factors > self.factors:
+            return
+        user_factors = getattr(other.model, "user_factors", None)
+        item_factors = getattr(other.model, "item_factors", None)
+        # factors of models trained on the GPU are not numpy arrays
+        if not isinstance(user_factors, np.ndarray) or not isinstance(
+            item_factors, np.ndarray
+        ):
+            return
+        extra = self.factors - other.factors
+        rng = np.random.default_rng(getattr(self.model, "random_state", None))
+        # the new latent columns go right after the old ones: implicit's LMF
+        # stores a constant and a bias column after the latent factors
+        self.model.user_factors, self.model.item_factors = (
+            np.hstack(
+                [
+                    f[:, : other.factors],
+                    rng.normal(0, 1e-2, (f.shape[0], extra)).astype(f.dtype),
+                    f[:, other.factors :],
+                ]
+            )
+            for f in (user_factors, item_factors)
+        )
+        self.model.iterations = min(self.model.iterations, WARM_START_ITERATIONS)
+
     def validate(
         self,
         train_mat: Union[np.ndarray, sparse.csr_matrix],
@@ -76,6 +195,15 @@ class Recommender:
             train_mat = sparse.csr_matrix(train_mat)
         if not isinstance(test_mat, sparse.csr_matrix):
             train_mat = sparse.csr_matrix(test_mat)
+        user_factors = getattr(self.model, "user_factors", None)
+        item_factors = getattr(self.model, "item_factors", None)
+        if isinstance(user_factors, np.ndarray) and isinstance(
+            item_factors, np.ndarray
+        ):
+            return ranking_metrics_at_k(
+                user_factors, item_factors, train_mat, test_mat, k=k
+            )
+        # e.g. factors of models trained on the GPU
         return evaluation.ranking_metrics_at_k(self.model, train_mat, test_mat, K=k)
 
     def save(self, savepath: Path):
@@ -91,12 +219,21 @@ class Recommender:
         ret.set_preferences()
         return ret
 
+    def __getstate__(self) -> dict:
+        # `preferences` (users x items) dwarfs the factors it is computed from,
+        # leave it out of pickles, e.g. memoized grid search results; rebuild
+        # it with `set_preferences` when needed
+        state = self.__dict__.copy()
+        state.pop("preferences", None)
+        return state
+
     def __repr__(self) -> str:
         return f"{type(self).__name__}:{self._model_class}"
 
 
 class ALS(Recommender):
     _model_class = AlternatingLeastSquares
+    train_dtype = np.float32
 
     def __init__(
         self,
@@ -120,6 +257,7 @@ class ALS(Recommender):
 
 class LMF(Recommender):
     _model_class = LogisticMatrixFactorization
+    train_dtype = np.float32
 
     def __init__(
         self,
@@ -167,6 +305,10 @@ class SVDS(Recommender, MatrixFactorizationBase):
     def model(self) -> "SVDS":
         return self
 
+    def warm_start(self, other: "Recommender"):
+        # truncated SVD is solved from scratch, nothing to initialize
+        pass
+
     def fit(self, user_items: Union[np.ndarray, sparse.csr_array], **_):
         U, sigma, Vt = self._model_class(
             user_items, k=self.factors, random_state=next(self.random_state)
@@ -71,12 +71,15 @@ def experiment_5_1_1(
 
     # dictionary to store the metrics by factors, easy to use with pandas
     metrics_dict = {"mean_envy": {}, "prop_eps_envy": {}}
+    # all recommenders have preferences of the same shape, recycle the buffer
+    probs_buf = None
 
     for filename in recommender_filenames:
         recommender_model = model_class.load(filename)
         recommender_probs = utils.softmax(
-            recommender_model.preferences, temperature=temperature
+            recommender_model.preferences, temperature=temperature, out=probs_buf
         )
+        probs_buf = recommender_probs
         utilities = compute_utilities(recommender_probs, ground_truth)
         mean_envy, prop_envy_users = get_envy_metrics(utilities, eps)
 
@@ -1,16 +1,23 @@
 import logging
+import math
 import zipfile
+from multiprocessing import shared_memory
 from pathlib import Path
-from typing import Tuple, Union
+from typing import Dict, List, Tuple, Union
 
 import numpy as np
 import pandas as pd
 import requests
-import scipy
 from implicit import evaluation
 from scipy import sparse
 from tqdm import tqdm
 
+try:
+    from numba import njit, prange
+except ImportError:
+    # numba is optional, `softmax` falls back to numpy
+    njit = None
+
 
 # https://stackoverflow.com/a/56970565
 def tqdm_extract(source_file, target_path):
@@ -63,6 +70,86 @@ class SeedSequence:
         return f"<{type(self).__name__}>:{self.val}"
 
 
+# shared memory blocks attached by this process, see `attach_shared_csr`
+# by group, see `SharedCSRMatrix`
+_ATTACHED_SHM: Dict[str, Dict[str, shared_memory.SharedMemory]] = {}
+
+
+class SharedCSRMatrix:
+    """
+    Copy of a CSR matrix in shared memory, to hand large matrices to worker
+    processes. Pickling it only sends the names of its shared memory blocks,
+    and unpickling attaches to them, giving back a sparse.csr_matrix which
+    shares its data with the original. Should be used as a context manager,
+    the shared memory is released on exit.
+
+    Matrices used together, e.g. by one grid search, should share a `group`:
+    worker processes outlive them, and release the blocks of the previous
+    group when attaching to a new one.
+    """
+
+    shape: Tuple[int, int]
+    blocks: List[Tuple[shared_memory.SharedMemory, Tuple[int, ...], str]]
+    group: str
+
+    def __init__(self, mat: sparse.csr_matrix, group: str = None):
+        self.shape = mat.shape
+        self.blocks = []
+        for arr in (mat.data, mat.indices, mat.indptr):
+            # SharedMemory does not accept size 0, e.g. for an empty matrix
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+            self.blocks.append((shm, arr.shape, arr.dtype.str))
+        self.group = group or self.blocks[0][0].name
+
+    def __reduce__(self):
+        blocks = [(shm.name, shape, dtype) for shm, shape, dtype in self.blocks]
+        return attach_shared_csr, (self.shape, blocks, self.group)
+
+    def __enter__(self) -> "SharedCSRMatrix":
+        return self
+
+    def __exit__(self, *_):
+        for shm, *_ in self.blocks:
+            shm.close()
+            shm.unlink()
+
+
+def release_shared_csr():
+    """Detaches this process from the shared memory blocks it attached to."""
+    for group in list(_ATTACHED_SHM):
+        attached = _ATTACHED_SHM[group]
+        for name in list(attached):
+            try:
+                attached[name].close()
+            except BufferError:
+                # still referenced by a matrix, retried on the next release
+                continue
+            del attached[name]
+        if not attached:
+            del _ATTACHED_SHM[group]
+
+
+def attach_shared_csr(
+    shape: Tuple[int, int],
+    blocks: List[Tuple[str, Tuple[int, ...], str]],
+    group: str,
+) -> sparse.csr_matrix:
+    if group not in _ATTACHED_SHM:
+        release_shared_csr()
+        _ATTACHED_SHM[group] = {}
+    attached = _ATTACHED_SHM[group]
+    arrays = []
+    for name, arr_shape, dtype in blocks:
+        if name not in attached:
+            # NOTE workers share the resource tracker of the creating process,
+            # which unlinks the block only if it is leaked by the latter
+            attached[name] = shared_memory.SharedMemory(name=name)
+        buf = attached[name].buf
+        arrays.append(np.ndarray(arr_shape, dtype=dtype, buffer=buf))
+    return sparse.csr_matrix(tuple(arrays), shape=shape, copy=False)
+
+
 def setup_root_logging(level: int = logging.INFO):
     """
     Root entry point to set up logging config. Should be called once from the
@@ -80,20 +167,88 @@ def setup_root_logging(level: int = logging.INFO):
     )
 
 
-def softmax(preferences: np.ndarray, temperature: float = 1.0) -> np.ndarray:
+if njit is not None:
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _softmax_rows(x: np.ndarray, inv_t: float, out: np.ndarray):
+        # one pass per row for the max, one for exp and sum, one to normalize;
+        # rows are split across cores
+        for i in prange(x.shape[0]):
+            m = x[i, 0]
+            for j in range(1, x.shape[1]):
+                if x[i, j] > m:
+                    m = x[i, j]
+            s = 0.0
+            for j in range(x.shape[1]):
+                v = math.exp((x[i, j] - m) * inv_t)
+                out[i, j] = v
+                s += v
+            inv_s = 1.0 / s
+            for j in range(x.shape[1]):
+                out[i, j] *= inv_s
+
+else:
+    _softmax_rows = None
+
+
+def softmax(
+    preferences: np.ndarray, temperature: float = 1.0, out: np.ndarray = None
+) -> np.ndarray:
     """
     Transforms preference scores into probabilities by applying softmax.
 
     Args:
         preferences: 2D array of unbounded scores.
         temperature: Optional temperature parameter for softmax, default: 1.0.
+        out: Optional buffer with the shape of `preferences` where the result
+             is written, to recycle memory across calls; its dtype sets the
+             precision of the computation (e.g. np.float32).
 
     Returns:
         A matrix of probabilities computed row-wise from `preferences`.
     """
     if len(preferences.shape) < 2:
         preferences = preferences[None, :]
-    return scipy.special.softmax(preferences / temperature, axis=1).squeeze()
+    if out is None:
+        out = np.empty(
+            preferences.shape, dtype=np.result_type(preferences.dtype, np.float32)
+        )
+    buf = out.reshape(preferences.shape)
+    if _softmax_rows is not None and preferences.dtype.kind == "f":
+        _softmax_rows(preferences, 1.0 / temperature, buf)
+        return buf.squeeze()
+    # computed in place in `out`, without full size temporaries
+    np.subtract(preferences, preferences.max(axis=1, keepdims=True), out=buf)
+    if temperature != 1.0:
+        np.multiply(buf, 1.0 / temperature, out=buf)
+    np.exp(buf, out=buf)
+    buf /= buf.sum(axis=1, keepdims=True)
+    return buf.squeeze()
+
+
+def nearest_neighbour_order(points: np.ndarray) -> List[int]:
+    """
+    Greedy nearest neighbour tour over a set of points.
+
+    Args:
+        points: 2D array, one point per row.
+
+    Returns:
+        The row indices of `points`, starting from the lexicographically
+        smallest point and moving each time to the closest unvisited one
+        (L2 distance).
+    """
+    start = int(np.lexsort(points.T[::-1])[0])
+    tour = [start]
+    unvisited = np.ones(len(points), dtype=bool)
+    unvisited[start] = False
+    for _ in range(len(points) - 1):
+        dists = np.linalg.norm(points - points[tour[-1]], axis=1)
+        dists[~unvisited] = np.inf
+        nxt = int(np.argmin(dists))
+        tour.append(nxt)
+        unvisited[nxt] = False
+    return tour
 
 
 def train_test_split(
@@ -126,7 +281,9 @@ def train_test_split(
 #     # return (arr - mean) / std
 
 
-# def one_hot(labels: np.ndarray, max_label: int) -> np.ndarray:
+# def one_hot(
+#     labels: np.ndarray, max_label: int, dense: bool = False
+# ) -> Union[sparse.csr_matrix, np.ndarray]:
 #     """
 #     Makes a one-hot-encoded matrix from labels.
 
@@ -135,18 +292,29 @@ def train_test_split(
 #                 should be 1.
 #         max_label: The size of a one-hot-encoded vector (a row in the return
 #                    matrix)
+#         dense: Whether to return a dense array instead of a sparse matrix,
+#                default: False.
 
 #     Returns:
-#         A one-hot-encoded 2D array with 1s at `labels`, 0s elsewhere.
+#         A one-hot-encoded 2D uint8 matrix with 1s at `labels`, 0s elsewhere.
 #     """
 #     assert (
 #         labels.max() <= max_label
 #     ), f"max_label is {max_label}, but labels containst values up to {labels.max()}"
-#     if len(labels.shape) < 2:
-#         labels = labels[:, None]
-#     one_hot_mat = np.zeros((labels.size, max_label), dtype=int)
-#     np.put_along_axis(one_hot_mat, labels, 1, axis=1)
-#     return one_hot_mat
+#     labels = labels.ravel()
+#     if dense:
+#         one_hot_mat = np.zeros((labels.size, max_label), dtype=np.uint8)
+#         one_hot_mat[np.arange(labels.size), labels] = 1
+#         return one_hot_mat
+#     # one nonzero per row, built directly in CSR format
+#     return sparse.csr_matrix(
+#         (
+#             np.ones(labels.size, dtype=np.uint8),
+#             labels,
+#             np.arange(labels.size + 1),
+#         ),
+#         shape=(labels.size, max_label),
+#     )
 
 
 # def minmax_scale(a: np.ndarray) -> np.ndarray: